@@ -1,24 +1,49 @@
 import os
 import cv2
-import mediapipe as mp
+import numpy as np
 import math
+import mediapipe as mp
 import time
 import json
+import copy
+import queue
+import threading
+import signal
+import tempfile
+from numba import njit
 import serial
 import serial.tools.list_ports
 from datetime import datetime, timedelta
 
+try:
+    import ffmpegcv
+except ImportError:
+    ffmpegcv = None
+
 os.environ["GLOG_minloglevel"] = "2"
 
+cv2.setUseOptimized(True)
+cv2.setNumThreads(os.cpu_count() or 1)
+
 CAMERA_INDEX_OPTIONS = [1, 0]
 FRAME_WIDTH = 640
 FRAME_HEIGHT = 320
+CAMERA_FPS = 30
 EAR_THRESHOLD = 0.18
 SLEEP_TRIGGER_TIME = 1.25
 MAX_RECORDING_DURATION = 300
 NO_FACE_IDLE_TIMEOUT = 5
 NO_LANDMARK_THRESHOLD = 10
 BAUD_RATE = 9600
+SERIAL_WRITE_TIMEOUT = 0.05
+DECODE_EVERY = 3
+INFERENCE_SCALE = 0.5
+DEBUG_DRAW = False
+MOTION_THRESHOLD = 500
+PAUSED_POLL_INTERVAL = 0.1
+UI_FPS = 10
+VIDEO_QUEUE_SIZE = 32
+HEADLESS = os.environ.get("MYRIAD_HEADLESS") == "1"
 
 SAVE_PATH = "saved"
 VIDEO_FOLDER = os.path.join(SAVE_PATH, "video")
@@ -37,6 +62,41 @@ def load_json_safe(path):
         print("[ERROR] JSON is invalid or empty. Resetting.")
         return {"accident": {}, "connected-ino": False}
 
+STATE = load_json_safe(JSON_PATH)
+
+json_queue = queue.Queue()
+
+def json_writer():
+    while True:
+        data = json_queue.get()
+        if data is None:
+            break
+        try:
+            tmp_path = JSON_PATH + ".tmp"
+            with open(tmp_path, "w") as f:
+                f.write(json.dumps(data, indent=4))
+            os.replace(tmp_path, JSON_PATH)
+        except Exception as e:
+            print("[WARNING] Failed to write JSON file:", e)
+
+json_thread = threading.Thread(target=json_writer, daemon=True)
+json_thread.start()
+
+def save_state():
+    json_queue.put(copy.deepcopy(STATE))
+
+def build_video_index(folder):
+    index = []
+    for f in sorted(os.listdir(folder)):
+        path = os.path.join(folder, f)
+        if f.endswith((".avi", ".mp4")) and os.path.isfile(path):
+            index.append({"path": path.replace("\\", "/"), "ctime": os.path.getctime(path)})
+    return index
+
+if "video-index" not in STATE:
+    STATE["video-index"] = build_video_index(VIDEO_FOLDER)
+    save_state()
+
 def find_arduino_port():
     ports = serial.tools.list_ports.comports()
     for port in ports:
@@ -51,6 +111,8 @@ def get_available_camera():
     for index in CAMERA_INDEX_OPTIONS:
         cap = cv2.VideoCapture(index, cv2.CAP_DSHOW)
         if cap is not None and cap.read()[0]:
+            cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+            cap.set(cv2.CAP_PROP_FPS, CAMERA_FPS)
             cap.set(cv2.CAP_PROP_FRAME_WIDTH, FRAME_WIDTH)
             cap.set(cv2.CAP_PROP_FRAME_HEIGHT, FRAME_HEIGHT)
             print(f"[INFO] Using camera : {index}")
@@ -63,7 +125,7 @@ def update_arduino_status():
     if port is None:
         return None, False
     try:
-        arduino = serial.Serial(port, BAUD_RATE)
+        arduino = serial.Serial(port, BAUD_RATE, write_timeout=SERIAL_WRITE_TIMEOUT)
         time.sleep(2)
         print("[INFO] Arduino status : connected.")
         arduino_connected = True
@@ -73,15 +135,16 @@ def update_arduino_status():
         print("[WARNING] Arduino is not connected.")
 
     try:
-        data = load_json_safe(JSON_PATH)
-        data["connected-ino"] = arduino_connected
-        with open(JSON_PATH, "w") as f:
-            json.dump(data, f, indent=4)
+        STATE["connected-ino"] = arduino_connected
+        save_state()
     except:
         print("[WARNING] JSON file couldn't be updated.")
     return arduino, arduino_connected
 
 cap = get_available_camera()
+video_fps = cap.get(cv2.CAP_PROP_FPS)
+if video_fps <= 0:
+    video_fps = CAMERA_FPS
 arduino, arduino_connected = update_arduino_status()
 
 mp_face_mesh = mp.solutions.face_mesh
@@ -91,22 +154,48 @@ mp_style = mp.solutions.drawing_styles
 face_mesh = mp_face_mesh.FaceMesh(
     static_image_mode=False,
     max_num_faces=1,
-    refine_landmarks=True,
+    refine_landmarks=False,
     min_detection_confidence=0.5,
     min_tracking_confidence=0.5
 )
 
 LEFT_EYE = [33, 160, 158, 133, 153, 144]
 RIGHT_EYE = [362, 385, 387, 263, 373, 380]
+EYE_IDX = np.array([LEFT_EYE, RIGHT_EYE])
+EYE_IDX_FLAT = EYE_IDX.ravel().tolist()
+
+TS_TEXT_W = cv2.getTextSize("00/00/0000 00:00:00", cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)[0][0]
+
+def eye_points(face, w, h):
+    lms = face.landmark
+    pts = np.fromiter((v for i in EYE_IDX_FLAT for v in (lms[i].x, lms[i].y)),
+                      dtype=np.float32, count=2 * len(EYE_IDX_FLAT))
+    pts = pts.reshape(EYE_IDX.shape + (2,))
+    pts *= (w, h)
+    return pts.astype(np.int32)
+
+@njit(cache=True, fastmath=True)
+def eye_aspect_ratios(eye_pts, threshold):
+    ears = np.zeros(2, dtype=np.float32)
+    closed = np.zeros(2, dtype=np.bool_)
+    for e in range(2):
+        p = eye_pts[e]
+        ax, ay = p[1, 0] - p[5, 0], p[1, 1] - p[5, 1]
+        bx, by = p[2, 0] - p[4, 0], p[2, 1] - p[4, 1]
+        cx, cy = p[0, 0] - p[3, 0], p[0, 1] - p[3, 1]
+        dA2 = float(ax * ax + ay * ay)
+        dB2 = float(bx * bx + by * by)
+        dC2 = float(cx * cx + cy * cy)
+        num = dA2 + dB2 + 2.0 * math.sqrt(dA2 * dB2)  # (A + B)^2
+        den = 4.0 * dC2                               # (2C)^2
+        if den == 0:
+            closed[e] = True
+        else:
+            closed[e] = num < threshold * threshold * den
+            ears[e] = math.sqrt(num / den)
+    return ears, closed
 
-def eye_aspect_ratio(landmarks, eye_indices):
-    try:
-        A = math.dist(landmarks[eye_indices[1]], landmarks[eye_indices[5]])
-        B = math.dist(landmarks[eye_indices[2]], landmarks[eye_indices[4]])
-        C = math.dist(landmarks[eye_indices[0]], landmarks[eye_indices[3]])
-        return (A + B) / (2.0 * C)
-    except:
-        return 0.0
+eye_aspect_ratios(np.zeros((2, 6, 2), dtype=np.int32), EAR_THRESHOLD)
 
 def create_accident_entry(counter, sleep_time, wake_time=None, video_path=""):
     duration = str(timedelta(seconds=int(wake_time - sleep_time))) if wake_time else "00:00:00"
@@ -114,25 +203,248 @@ def create_accident_entry(counter, sleep_time, wake_time=None, video_path=""):
     key = f"accident-{counter}"
 
     try:
-        data = load_json_safe(JSON_PATH)
-        data["accident"][key] = {
+        STATE["accident"][key] = {
             "time": dt_str,
             "opened": bool(wake_time),
             "how-long": duration,
             "video-path": video_path.replace("\\", "/")
         }
-        with open(JSON_PATH, "w") as f:
-            json.dump(data, f, indent=4)
+        save_state()
     except Exception as e:
         print("[WARNING] Failed to write accident data:", e)
 
-def delete_old_videos(folder, days_old=30):
-    now = time.time()
-    for f in os.listdir(folder):
-        path = os.path.join(folder, f)
-        if os.path.isfile(path) and (now - os.path.getctime(path)) > (days_old * 86400):
+def probe_nvenc():
+    if ffmpegcv is None:
+        return False
+    path = os.path.join(tempfile.gettempdir(), "myriad-nvenc-probe.mp4")
+    try:
+        writer = ffmpegcv.VideoWriterNV(path, "h264", video_fps)
+        blank = np.zeros((FRAME_HEIGHT, FRAME_WIDTH, 3), dtype=np.uint8)
+        for _ in range(5):
+            writer.write(blank)
+        writer.release()
+        return os.path.exists(path) and os.path.getsize(path) > 0
+    except Exception:
+        return False
+    finally:
+        if os.path.exists(path):
             os.remove(path)
 
+NVENC_AVAILABLE = probe_nvenc()
+if ffmpegcv is not None and not NVENC_AVAILABLE:
+    print("[WARNING] NVENC not available, falling back to OpenCV.")
+
+def open_video_writer(base_path, w, h):
+    if NVENC_AVAILABLE:
+        path = base_path + ".mp4"
+        return ffmpegcv.VideoWriterNV(path, "h264", video_fps), path
+
+    path = base_path + ".mp4"
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'avc1'), video_fps, (w, h))
+    if writer.isOpened():
+        return writer, path
+    writer.release()
+
+    path = base_path + ".avi"
+    return cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'XVID'), video_fps, (w, h)), path
+
+video_queue = queue.Queue(maxsize=VIDEO_QUEUE_SIZE)
+failed_writers = {}
+
+def video_worker():
+    while True:
+        item = video_queue.get()
+        if item is None:
+            break
+        writer, frame = item
+        if id(writer) in failed_writers:
+            if frame is None:
+                del failed_writers[id(writer)]
+            continue
+        try:
+            if frame is None:
+                writer.release()
+            else:
+                writer.write(frame)
+        except Exception as e:
+            print("[WARNING] Failed to write video:", e)
+            if frame is not None:
+                failed_writers[id(writer)] = writer
+                try:
+                    writer.release()
+                except Exception:
+                    pass
+
+video_thread = threading.Thread(target=video_worker, daemon=True)
+video_thread.start()
+
+def write_frame(writer, frame):
+    if id(writer) in failed_writers:
+        return
+    # Drop the incoming frame rather than the oldest item: the queue also
+    # carries release commands, and discarding one would leak the writer.
+    try:
+        video_queue.put_nowait((writer, frame))
+    except queue.Full:
+        pass
+
+def release_writer(writer):
+    video_queue.put((writer, None))
+
+writer_lock = threading.Lock()
+
+def draw_status(image, eyes_closed, avg_ear, alert):
+    if alert:
+        cv2.putText(image, "ALERT: Don't Close Your Eyes!", (30, 90),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
+    status = "[INFO] Eyes Status : Closed" if eyes_closed else "[INFO] Eyes Status : Open"
+    color = (0, 0, 255) if eyes_closed else (0, 255, 0)
+    cv2.putText(image, status, (30, 50), cv2.FONT_HERSHEY_SIMPLEX, 0.8, color, 2)
+    cv2.putText(image, f"EAR: {avg_ear:.2f}", (30, 120), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2)
+
+def record_frame(writer, frame, captured_at):
+    stamped = frame.copy()
+    overlay = record_overlay
+    if overlay is not None:
+        eye_pts, eyes_closed, avg_ear, alert = overlay
+        cv2.polylines(stamped, list(eye_pts), isClosed=True, color=(0, 255, 0), thickness=1)
+        draw_status(stamped, eyes_closed, avg_ear, alert)
+    timestamp_str = datetime.fromtimestamp(captured_at).strftime("%d/%m/%Y %H:%M:%S")
+    text_x = stamped.shape[1] - TS_TEXT_W - 10
+    cv2.putText(stamped, timestamp_str, (text_x, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+    write_frame(writer, stamped)
+
+def stop_video_writer():
+    global video_writer
+    with writer_lock:
+        if video_writer is not None:
+            release_writer(video_writer)
+            video_writer = None
+
+def send_state(state=None):
+    global arduino_state, pending_arduino_state
+    if state is not None:
+        pending_arduino_state = state
+    if arduino is None or pending_arduino_state in (None, arduino_state):
+        return
+    try:
+        arduino.write(pending_arduino_state)
+        arduino_state = pending_arduino_state
+    except serial.SerialTimeoutException:
+        print("[WARNING] Arduino write timed out.")
+
+def end_recording(wake_time=None):
+    global accident_counter, recording
+    create_accident_entry(accident_counter, accident_start_time, wake_time, video_filename)
+    accident_counter += 1
+    stop_video_writer()
+    recording = False
+    send_state(b'0')
+
+def delete_old_videos(days_old=30):
+    now = time.time()
+    kept = []
+    for entry in STATE["video-index"]:
+        if now - entry["ctime"] > days_old * 86400:
+            try:
+                os.remove(entry["path"])
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print("[WARNING] Failed to delete old video:", e)
+                kept.append(entry)
+        else:
+            kept.append(entry)
+    if len(kept) != len(STATE["video-index"]):
+        STATE["video-index"] = kept
+        save_state()
+
+def ui_due(now):
+    return not HEADLESS and now - last_show >= 1 / UI_FPS
+
+def show_frame(image, now):
+    global last_show
+    cv2.imshow("Eye Detection", image)
+    last_show = now
+    return cv2.waitKey(1) & 0xFF == 27
+
+def put_latest(q, item):
+    while True:
+        try:
+            q.put_nowait(item)
+            return
+        except queue.Full:
+            try:
+                q.get_nowait()
+            except queue.Empty:
+                pass
+
+def capture_worker():
+    frame_idx = 0
+    try:
+        while not stop_event.is_set():
+            if not cap.grab():
+                print("[ERROR] Failed to read frame from camera.")
+                break
+
+            frame_idx += 1
+            if not recording and frame_idx % DECODE_EVERY:
+                continue
+
+            ret, frame = cap.retrieve()
+            if not ret:
+                print("[ERROR] Failed to read frame from camera.")
+                break
+            captured_at = time.time()
+            with writer_lock:
+                if video_writer is not None:
+                    record_frame(video_writer, frame, captured_at)
+            put_latest(capture_queue, (frame, captured_at))
+    finally:
+        put_latest(capture_queue, None)
+
+def inference_worker():
+    small_buf = rgb_buf = gray_buf = prev_gray_buf = None
+    has_prev_gray = False
+    try:
+        while True:
+            item = capture_queue.get()
+            if item is None:
+                break
+            frame, captured_at = item
+
+            h, w = frame.shape[:2]
+            small_size = (int(w * INFERENCE_SCALE), int(h * INFERENCE_SCALE))
+            if small_buf is None or small_buf.shape[:2] != small_size[::-1]:
+                small_buf = np.empty((small_size[1], small_size[0], 3), dtype=np.uint8)
+                rgb_buf = np.empty_like(small_buf)
+                gray_buf = np.empty(small_buf.shape[:2], dtype=np.uint8)
+                prev_gray_buf = np.empty_like(gray_buf)
+                has_prev_gray = False
+
+            cv2.resize(frame, small_size, dst=small_buf, interpolation=cv2.INTER_AREA)
+
+            if paused:
+                cv2.cvtColor(small_buf, cv2.COLOR_BGR2GRAY, dst=gray_buf)
+                motion = 0
+                if has_prev_gray:
+                    diff = cv2.absdiff(prev_gray_buf, gray_buf)
+                    motion = cv2.countNonZero(cv2.threshold(diff, 25, 255, cv2.THRESH_BINARY)[1])
+                gray_buf, prev_gray_buf = prev_gray_buf, gray_buf
+                has_prev_gray = True
+                if motion <= MOTION_THRESHOLD:
+                    put_latest(result_queue, (frame, captured_at, None))
+                    time.sleep(PAUSED_POLL_INTERVAL)
+                    continue
+            else:
+                has_prev_gray = False
+
+            cv2.cvtColor(small_buf, cv2.COLOR_BGR2RGB, dst=rgb_buf)
+            results = face_mesh.process(rgb_buf)
+            put_latest(result_queue, (frame, captured_at, results))
+    finally:
+        put_latest(result_queue, None)
+
 # === STATE ===
 paused = False
 closed_start_time = None
@@ -143,118 +455,129 @@ accident_counter = 1
 recording = False
 face_last_seen = time.time()
 no_landmark_counter = 0
+arduino_state = None
+pending_arduino_state = None
+last_show = 0
+record_overlay = None
+gray_buf = dimmed_buf = dimmed_bgr_buf = None
+
+capture_queue = queue.Queue(maxsize=2)
+result_queue = queue.Queue(maxsize=2)
+stop_event = threading.Event()
+signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+capture_thread = threading.Thread(target=capture_worker, daemon=True)
+inference_thread = threading.Thread(target=inference_worker, daemon=True)
+capture_thread.start()
+inference_thread.start()
+
+try:
+    while True:
+        item = result_queue.get()
+        if item is None:
+            break
+        frame, now_f, results = item
+        send_state()
+
+        h, w = frame.shape[:2]
+        if gray_buf is None or gray_buf.shape != (h, w):
+            gray_buf = np.empty((h, w), dtype=np.uint8)
+            dimmed_buf = np.empty_like(gray_buf)
+            dimmed_bgr_buf = np.empty((h, w, 3), dtype=np.uint8)
+
+        if results is not None and results.multi_face_landmarks:
+            paused = False
+            face_last_seen = now_f
+
+            face = results.multi_face_landmarks[0]
+            alert = False
+            eye_pts = eye_points(face, w, h)
+
+            if DEBUG_DRAW:
+                mp_drawing.draw_landmarks(
+                    frame, face,
+                    mp_face_mesh.FACEMESH_CONTOURS,
+                    landmark_drawing_spec=None,
+                    connection_drawing_spec=mp_style.get_default_face_mesh_contours_style()
+                )
+            else:
+                cv2.polylines(frame, list(eye_pts), isClosed=True, color=(0, 255, 0), thickness=1)
+
+            ears, closed = eye_aspect_ratios(eye_pts, EAR_THRESHOLD)
+            visible = ((eye_pts >= 0) & (eye_pts < (w, h))).all(axis=(1, 2))
+
+            if visible.any():
+                visible_ears = ears[visible]
+                avg_ear = float(visible_ears.mean())
+                eyes_closed = bool(closed[visible].all())
+                no_landmark_counter = 0
+            else:
+                no_landmark_counter += 1
+                avg_ear = 0.0
+                eyes_closed = no_landmark_counter > NO_LANDMARK_THRESHOLD
+
+            if eyes_closed:
+                if closed_start_time is None:
+                    closed_start_time = now_f
+                elif now_f - closed_start_time >= SLEEP_TRIGGER_TIME:
+                    alert = True
+                    if not recording:
+                        timestamp = datetime.fromtimestamp(now_f).strftime("%Y%m%d_%H%M%S")
+                        with writer_lock:
+                            video_writer, video_filename = open_video_writer(
+                                os.path.join(VIDEO_FOLDER, timestamp), w, h)
+                        STATE["video-index"].append({
+                            "path": video_filename.replace("\\", "/"),
+                            "ctime": now_f
+                        })
+                        save_state()
+                        video_start_time = now_f
+                        accident_start_time = video_start_time
+                        recording = True
+                        send_state(b'1')
+            else:
+                if recording:
+                    end_recording(now_f)
+                closed_start_time = None
+                no_landmark_counter = 0
+
+            draw_status(frame, eyes_closed, avg_ear, alert)
+            record_overlay = (eye_pts, eyes_closed, avg_ear, alert)
 
-while True:
-    ret, frame = cap.read()
-    if not ret:
-        print("[ERROR] Failed to read frame from camera.")
-        break
-
-    h, w = frame.shape[:2]
-    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    results = face_mesh.process(rgb)
-
-    if results.multi_face_landmarks:
-        paused = False
-        face_last_seen = time.time()
-
-        face = results.multi_face_landmarks[0]
-        landmarks = [(int(lm.x * w), int(lm.y * h)) for lm in face.landmark]
-
-        mp_drawing.draw_landmarks(
-            frame, face,
-            mp_face_mesh.FACEMESH_CONTOURS,
-            landmark_drawing_spec=None,
-            connection_drawing_spec=mp_style.get_default_face_mesh_tesselation_style()
-        )
-
-        visible_ears = []
-        for eye in (LEFT_EYE, RIGHT_EYE):
-            if all(0 <= landmarks[i][0] < w and 0 <= landmarks[i][1] < h for i in eye):
-                visible_ears.append(eye_aspect_ratio(landmarks, eye))
-
-        if visible_ears:
-            avg_ear = sum(visible_ears) / len(visible_ears)
-            eyes_closed = all(ear < EAR_THRESHOLD for ear in visible_ears)
-            no_landmark_counter = 0
         else:
-            no_landmark_counter += 1
-            avg_ear = 0.0
-            eyes_closed = no_landmark_counter > NO_LANDMARK_THRESHOLD
-
-        if eyes_closed:
-            if closed_start_time is None:
-                closed_start_time = time.time()
-            elif time.time() - closed_start_time >= SLEEP_TRIGGER_TIME:
-                cv2.putText(frame, "ALERT: Don't Close Your Eyes!", (30, 90),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
-                if not recording:
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    video_filename = os.path.join(VIDEO_FOLDER, f"{timestamp}.avi")
-                    fourcc = cv2.VideoWriter_fourcc(*'XVID')
-                    video_writer = cv2.VideoWriter(video_filename, fourcc, 20.0, (w, h))
-                    video_start_time = time.time()
-                    accident_start_time = video_start_time
-                    recording = True
-                    if arduino:
-                        arduino.write(b'1')
-        else:
-            if recording:
-                wake_time = time.time()
-                create_accident_entry(accident_counter, accident_start_time, wake_time, video_filename)
-                accident_counter += 1
-                video_writer.release()
-                video_writer = None
-                recording = False
-                if arduino:
-                    arduino.write(b'0')
-            closed_start_time = None
-            no_landmark_counter = 0
-
-        status = "[INFO] Eyes Status : Closed" if eyes_closed else "[INFO] Eyes Status : Open"
-        color = (0, 0, 255) if eyes_closed else (0, 255, 0)
-        cv2.putText(frame, status, (30, 50), cv2.FONT_HERSHEY_SIMPLEX, 0.8, color, 2)
-        cv2.putText(frame, f"EAR: {avg_ear:.2f}", (30, 120), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2)
-
-    else:
-        if not paused and time.time() - face_last_seen > NO_FACE_IDLE_TIMEOUT:
-            paused = True
-            if arduino:
-                arduino.write(b'2')
-
-        if paused:
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            dimmed = cv2.convertScaleAbs(gray, alpha=0.5)
-            dimmed_bgr = cv2.cvtColor(dimmed, cv2.COLOR_GRAY2BGR)
-            cv2.putText(dimmed_bgr, "Idle Mode: No Face detected!", (30, 50),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (100, 100, 255), 2)
-            cv2.imshow("Eye Detection", dimmed_bgr)
-            if cv2.waitKey(1) & 0xFF == 27:
-                break
-            continue
-
-    if recording and video_writer:
-        timestamp_str = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-        text_size, _ = cv2.getTextSize(timestamp_str, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)
-        text_x = w - text_size[0] - 10
-        cv2.putText(frame, timestamp_str, (text_x, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-        video_writer.write(frame)
-
-        if time.time() - video_start_time >= MAX_RECORDING_DURATION:
-            create_accident_entry(accident_counter, accident_start_time, None, video_filename)
-            accident_counter += 1
-            video_writer.release()
-            video_writer = None
-            recording = False
-            if arduino:
-                arduino.write(b'0')
-
-    cv2.imshow("Eye Detection", frame)
-    if cv2.waitKey(1) & 0xFF == 27:
-        break
-
-cap.release()
-if video_writer:
-    video_writer.release()
-cv2.destroyAllWindows()
-delete_old_videos(VIDEO_FOLDER, days_old=30)
+            record_overlay = None
+            if not paused and now_f - face_last_seen > NO_FACE_IDLE_TIMEOUT:
+                paused = True
+                if recording:
+                    end_recording()
+                send_state(b'2')
+
+            if paused:
+                if ui_due(now_f):
+                    cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=gray_buf)
+                    cv2.convertScaleAbs(gray_buf, dst=dimmed_buf, alpha=0.5)
+                    dimmed_bgr = cv2.cvtColor(dimmed_buf, cv2.COLOR_GRAY2BGR, dst=dimmed_bgr_buf)
+                    cv2.putText(dimmed_bgr, "Idle Mode: No Face detected!", (30, 50),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (100, 100, 255), 2)
+                    if show_frame(dimmed_bgr, now_f):
+                        break
+                continue
+
+        if recording and now_f - video_start_time >= MAX_RECORDING_DURATION:
+            end_recording()
+
+        if ui_due(now_f) and show_frame(frame, now_f):
+            break
+finally:
+    try:
+        stop_event.set()
+        capture_thread.join()
+        inference_thread.join()
+        cap.release()
+        stop_video_writer()
+        video_queue.put(None)
+        video_thread.join()
+        cv2.destroyAllWindows()
+        delete_old_videos(days_old=30)
+    finally:
+        json_queue.put(None)
+        json_thread.join()